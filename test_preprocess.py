@@ -0,0 +1,49 @@
+"""
+Tests for the automatic Otsu fast path in source_pipeline.
+
+Pages are synthetic evenly lit scans (paper 230-235 with sensor noise),
+written to a temporary PNG so the whole pipeline runs from decoding.
+"""
+import numpy as np
+import pytest
+
+qa = pytest.importorskip("Question_Answer_segmentation")
+cv2 = qa.cv2
+
+
+# -------------------------------------------------------------------
+# HELPERS
+# -------------------------------------------------------------------
+def write_page(path, ink_level=None, ink_rows=1):
+    """Write a 1600x1200 page with ink_rows bars of ink at ink_level"""
+    rng = np.random.default_rng(0)
+    page = np.linspace(230, 235, 1200)[None, :].repeat(1600, 0)
+    page = page + rng.normal(0, 4, page.shape)
+    if ink_level is not None:
+        for row in range(ink_rows):
+            top = 200 + 60 * row
+            page[top:top + 20, 100:700] = ink_level
+    cv2.imwrite(str(path), np.clip(page, 0, 255).astype(np.uint8))
+    return str(path)
+
+
+def black_fraction(image):
+    return np.count_nonzero(image == 0) / image.size
+
+
+# -------------------------------------------------------------------
+# TESTS
+# -------------------------------------------------------------------
+@pytest.mark.parametrize("ink_level", [None, 190])
+def test_blank_and_faint_pages_fall_back_to_adaptive(tmp_path, ink_level):
+    path = write_page(tmp_path / "page.png", ink_level)
+    binary = qa.source_pipeline(path)
+    assert black_fraction(binary) < 0.02
+    assert np.array_equal(binary, qa.source_pipeline(path, False))
+
+
+def test_dark_ink_keeps_otsu(tmp_path):
+    path = write_page(tmp_path / "page.png", 40, ink_rows=10)
+    binary = qa.source_pipeline(path)
+    assert np.array_equal(binary, qa.source_pipeline(path, True))
+    assert 0.05 < black_fraction(binary) < 0.1
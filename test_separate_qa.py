@@ -0,0 +1,190 @@
+"""
+Regression tests for the table-driven parser in separate_qa_with_regex.
+
+OCR is stubbed out: ocr_images is replaced with a function returning
+fixed page texts, so only the line parsing is exercised. The parser is
+compared against reference_separate_qa, a copy of the original
+regex priority ladder.
+"""
+import random
+import re
+
+import pytest
+
+qa = pytest.importorskip("Question_Answer_segmentation")
+
+
+# -------------------------------------------------------------------
+# REFERENCE PARSER (original priority ladder)
+# -------------------------------------------------------------------
+def reference_separate_qa(texts):
+    """The original parser, taking page texts instead of image paths"""
+    results = {"Questions": [], "Answers": []}
+    current_mode = None
+    current_text = ""
+    previous_line_was_empty = False
+
+    q_markers = r'^[QqBb][\.\)\:\-]\s*'
+    a_markers = r'^[Aa][\.\)\:\-]\s*|^[Aa]ns[\.\)\:\-]\s*|^[Aa]nswer[\.\)\:\-]\s*'
+    subdivision = r'^\s*[a-z]\s*[\.\)\:]\s*|^\s*\([a-z]\)\s*|^\s*[uw]\s*\)'
+
+    def save_current_item():
+        nonlocal current_text, current_mode
+        if current_text and current_mode:
+            current_text = re.sub(r'\s+', ' ', current_text).strip()
+            if current_text:
+                results[current_mode].append(current_text)
+        current_text = ""
+
+    for text in texts:
+        for line in text.split('\n'):
+            line = line.strip()
+            if not line:
+                previous_line_was_empty = True
+                continue
+            if len(line) < 2:
+                continue
+            line = re.sub(r'[^\w\s\?\.\,\:\;\(\)\-]', '', line).strip()
+            if not line:
+                previous_line_was_empty = True
+                continue
+
+            if line.endswith('?'):
+                if current_mode == "Answers" and current_text:
+                    save_current_item()
+                if current_mode == "Questions" and current_text and not previous_line_was_empty:
+                    current_text += " " + line
+                else:
+                    save_current_item()
+                    current_mode = "Questions"
+                    current_text = line
+                previous_line_was_empty = False
+                continue
+
+            if re.match(q_markers, line, re.IGNORECASE):
+                save_current_item()
+                current_mode = "Questions"
+                current_text = re.sub(q_markers, '', line, flags=re.IGNORECASE).strip()
+                previous_line_was_empty = False
+                continue
+
+            if re.match(a_markers, line, re.IGNORECASE):
+                save_current_item()
+                current_mode = "Answers"
+                current_text = re.sub(a_markers, '', line, flags=re.IGNORECASE).strip()
+                previous_line_was_empty = False
+                continue
+
+            if re.match(subdivision, line, re.IGNORECASE):
+                if current_text:
+                    current_text += " " + line
+                else:
+                    current_text = line
+                previous_line_was_empty = False
+                continue
+
+            if previous_line_was_empty and current_mode == "Questions" and current_text:
+                save_current_item()
+                current_mode = "Answers"
+                current_text = line
+                previous_line_was_empty = False
+                continue
+
+            if current_mode:
+                if current_text:
+                    current_text += " " + line
+                else:
+                    current_text = line
+            else:
+                current_mode = "Questions"
+                current_text = line
+            previous_line_was_empty = False
+
+        save_current_item()
+
+    return results
+
+
+# -------------------------------------------------------------------
+# HELPERS
+# -------------------------------------------------------------------
+@pytest.fixture
+def parse(monkeypatch):
+    """Run separate_qa_with_regex over page texts instead of images"""
+    def run(texts):
+        monkeypatch.setattr(
+            qa, "ocr_images",
+            lambda image_list, *args, **kwargs: iter(texts)
+        )
+        return qa.separate_qa_with_regex(list(range(len(texts))))
+    return run
+
+
+# Line fragments covering every marker, '?' endings, OCR noise,
+# whitespace variants and non-ASCII letters
+FRAGMENTS = [
+    "Q.)", "q:", "B-", "A.)", "Ans:", "answer.", "Answer-", "a)", "(b)",
+    "u)", "w )", "c .", "z:", "(", "x", "", "  ", "\t", "?", "what?",
+    "#@", "&", "hello", " world", "A", "Q", "é", "Ⅻ", "K)",
+    " ",
+]
+
+PAGE_ENDINGS = ["", "\n", "\n\n", "\r\n", " \r"]
+
+
+def random_document(rng):
+    pages = []
+    for _ in range(rng.randint(1, 3)):
+        lines = [
+            "".join(rng.choice(FRAGMENTS) + rng.choice(["", " "])
+                    for _ in range(rng.randint(0, 4)))
+            for _ in range(rng.randint(0, 12))
+        ]
+        pages.append("\n".join(lines) + rng.choice(PAGE_ENDINGS))
+    return pages
+
+
+# -------------------------------------------------------------------
+# TESTS
+# -------------------------------------------------------------------
+def test_markers_subdivisions_and_gaps(parse):
+    pages = [
+        "Q. What is photosynthesis\nand why does it matter?\n\n"
+        "It is the process by which plants\nmake food.\n"
+        "(a) light reaction\n\n"
+        "Q: Define cell.\nA: A cell is the basic unit & of life.\n"
+        "Ans: another one\n"
+    ]
+    assert parse(pages) == {
+        "Questions": [
+            "What is photosynthesis and why does it matter?",
+            "Define cell.",
+        ],
+        "Answers": [
+            "It is the process by which plants make food. (a) light reaction",
+            "A cell is the basic unit of life.",
+            "another one",
+        ],
+    }
+
+
+def test_mode_carries_across_pages(parse):
+    # Each page's last item is saved at the page break, but the mode
+    # carries over, so the next page continues in the same bucket
+    pages = ["What is gravity?\nA. It pulls\n", "things down.\n"]
+    assert parse(pages) == {
+        "Questions": ["What is gravity?"],
+        "Answers": ["It pulls", "things down."],
+    }
+
+
+def test_empty_input(parse):
+    assert parse([]) == {"Questions": [], "Answers": []}
+    assert parse([""]) == {"Questions": [], "Answers": []}
+
+
+def test_matches_reference_parser_on_random_documents(parse):
+    rng = random.Random(0)
+    for _ in range(2000):
+        pages = random_document(rng)
+        assert parse(pages) == reference_separate_qa(pages), pages
@@ -0,0 +1,88 @@
+"""
+Tests for template mode: the up-front template check in
+separate_qa_with_regex and the box cropping in _crop_box.
+
+OCR is stubbed out: ocr_images is replaced with a function returning
+fixed box texts, so no image is read.
+"""
+import numpy as np
+import pytest
+
+qa = pytest.importorskip("Question_Answer_segmentation")
+
+
+# -------------------------------------------------------------------
+# HELPERS
+# -------------------------------------------------------------------
+@pytest.fixture
+def ocr_calls(monkeypatch):
+    """Stub ocr_images, recording the templates it is called with"""
+    calls = []
+
+    def ocr_images(image_list, fast_preprocess=None, template=None):
+        calls.append(template)
+        return iter([
+            {bucket: [f"{bucket} {i}" for i in range(len(boxes))]
+             for bucket, boxes in template.items()}
+            for _ in image_list
+        ])
+
+    monkeypatch.setattr(qa, "ocr_images", ocr_images)
+    return calls
+
+
+# -------------------------------------------------------------------
+# TEMPLATE CHECK
+# -------------------------------------------------------------------
+def test_valid_template(ocr_calls):
+    template = {"Questions": [(0, 0, 10, 10), [5, 5, 2.5, 2.5]],
+                "Answers": ()}
+    assert qa.separate_qa_with_regex(["page"], template=template) == {
+        "Questions": ["Questions 0", "Questions 1"],
+        "Answers": [],
+    }
+
+
+@pytest.mark.parametrize("template", [
+    {"Summary": [(0, 0, 10, 10)]},
+    {"Questions": (0, 0, 10, 10)},
+    {"Questions": [(0, 0, 10)]},
+    {"Questions": [(0, 0, 10, "10")]},
+    {"Questions": "0, 0, 10, 10"},
+    {"Answers": None},
+])
+def test_invalid_template_rejected_before_ocr(ocr_calls, template):
+    with pytest.raises(ValueError):
+        qa.separate_qa_with_regex(["page"], template=template)
+    assert ocr_calls == []
+
+
+# -------------------------------------------------------------------
+# BOX CROPPING
+# -------------------------------------------------------------------
+PAGE = np.arange(100 * 200, dtype=np.int32).reshape(100, 200)
+
+
+def test_crop_box_scales_to_upscaled_page():
+    crop = qa._crop_box(PAGE, (10, 20, 30, 40), scale_factor=2.0)
+    assert np.array_equal(crop, PAGE[40:120, 20:80])
+
+
+def test_crop_box_clips_to_page():
+    assert np.array_equal(qa._crop_box(PAGE, (-5, 90, 20, 50)),
+                          PAGE[90:100, 0:15])
+    assert np.array_equal(qa._crop_box(PAGE, (120, 40, 20, 10), 1.5),
+                          PAGE[60:75, 180:200])
+
+
+@pytest.mark.parametrize("box", [
+    (200, 0, 10, 10),
+    (0, -20, 10, 10),
+    (10, 10, 0, 5),
+])
+def test_crop_box_off_page_is_none(box):
+    assert qa._crop_box(PAGE, box) is None
+
+
+def test_crop_box_missing_page_is_none():
+    assert qa._crop_box(None, (0, 0, 10, 10)) is None